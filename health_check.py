@@ -5,26 +5,60 @@ Used by Docker and monitoring systems to verify bot status
 """
 
 import os
+import re
+import struct
 import sys
 import time
-import json
-from datetime import datetime, timedelta
+
+# Only this many trailing bytes of the log are scanned for recent errors
+LOG_TAIL_BYTES = 8192
+
+# Critical error patterns, compiled into one alternation so the log tail is scanned once
+CRITICAL_ERRORS_RE = re.compile('|'.join(re.escape(error) for error in (
+    'CRITICAL',
+    'Failed to setup WebDriver',
+    'Failed to login to Facebook',
+    'Bot failed with error'
+)))
+
+# Possible log file locations, in lookup order
+POSSIBLE_LOG_PATHS = (
+    '/app/logs/messenger_bot.log',  # Docker
+    'logs/messenger_bot.log',       # Local/VPS
+    './logs/messenger_bot.log',     # Current directory
+    'messenger_bot.log'             # Legacy location
+)
+
+# Possible status file locations, in lookup order
+POSSIBLE_STATUS_PATHS = (
+    '/app/logs/bot_status.bin',  # Docker
+    'logs/bot_status.bin',       # Local/VPS
+    './logs/bot_status.bin'      # Current directory
+)
+
+# Heartbeat written by MessengerBot.update_heartbeat: one little-endian float64 unix timestamp
+HEARTBEAT_FORMAT = '<d'
+HEARTBEAT_SIZE = struct.calcsize(HEARTBEAT_FORMAT)
+
+def resolve_path(candidates):
+    """
+    Find the first existing file among candidates
+    
+    Returns:
+        tuple: (path, os.stat_result) or (None, None) if nothing exists
+    """
+    for path in candidates:
+        try:
+            stat_result = os.stat(path)
+        except OSError:
+            continue
+        return path, stat_result
+    
+    return None, None
 
 def check_log_file():
     """Check if the bot has logged activity recently"""
-    # Try different possible log file locations
-    possible_log_paths = [
-        '/app/logs/messenger_bot.log',  # Docker
-        'logs/messenger_bot.log',       # Local/VPS
-        './logs/messenger_bot.log',     # Current directory
-        'messenger_bot.log'             # Legacy location
-    ]
-    
-    log_file = None
-    for path in possible_log_paths:
-        if os.path.exists(path):
-            log_file = path
-            break
+    log_file, log_stat = resolve_path(POSSIBLE_LOG_PATHS)
     
     if not log_file:
         # If no logs directory exists, create it
@@ -34,7 +68,7 @@ def check_log_file():
         
     try:
         # Check if log file was modified in the last 10 minutes
-        file_mtime = os.path.getmtime(log_file)
+        file_mtime = log_stat.st_mtime
         current_time = time.time()
         
         # If log file is older than 10 minutes, consider it unhealthy
@@ -42,22 +76,17 @@ def check_log_file():
             return False
             
         # Check for recent error patterns in logs
-        with open(log_file, 'r') as f:
-            # Read last 50 lines
-            lines = f.readlines()[-50:]
-            recent_lines = ''.join(lines)
+        with open(log_file, 'rb') as f:
+            # Read last 50 lines from a bounded tail instead of the whole file
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - LOG_TAIL_BYTES))
+            tail = f.read().decode('utf-8', errors='replace')
+            lines = tail.splitlines()[-50:]
+            recent_lines = '\n'.join(lines)
             
             # Look for critical errors
-            critical_errors = [
-                'CRITICAL',
-                'Failed to setup WebDriver',
-                'Failed to login to Facebook',
-                'Bot failed with error'
-            ]
-            
-            for error in critical_errors:
-                if error in recent_lines:
-                    return False
+            if CRITICAL_ERRORS_RE.search(recent_lines):
+                return False
                     
         return True
         
@@ -67,33 +96,16 @@ def check_log_file():
 def check_process_status():
     """Check if the main bot process is running"""
     try:
-        # Try different possible status file locations
-        possible_status_paths = [
-            '/app/logs/bot_status.json',  # Docker
-            'logs/bot_status.json',       # Local/VPS
-            './logs/bot_status.json'      # Current directory
-        ]
-        
-        status_file = None
-        for path in possible_status_paths:
-            if os.path.exists(path):
-                status_file = path
-                break
+        status_file, _ = resolve_path(POSSIBLE_STATUS_PATHS)
         
         if not status_file:
             return False
             
-        with open(status_file, 'r') as f:
-            status = json.load(f)
-            
-        last_heartbeat = datetime.fromisoformat(status.get('last_heartbeat', ''))
-        current_time = datetime.now()
+        with open(status_file, 'rb') as f:
+            last_heartbeat, = struct.unpack(HEARTBEAT_FORMAT, f.read(HEARTBEAT_SIZE))
         
         # If last heartbeat is older than 15 minutes, consider unhealthy
-        if current_time - last_heartbeat > timedelta(minutes=15):
-            return False
-            
-        return status.get('status') == 'running'
+        return time.time() - last_heartbeat <= 900  # 15 minutes
         
     except Exception:
         return False
@@ -6,8 +6,8 @@ import sys
 import os
 import argparse
 import signal
-import threading
 import time
+from functools import lru_cache
 
 # Add src directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
@@ -16,8 +16,12 @@ from socks5_proxy import SOCKS5Server, BandwidthConfig
 from proxy_config import ProxyConfig
 
 
+BYTE_UNITS = ('B', 'KB', 'MB', 'GB')
+STATS_INTERVAL = 30  # Seconds between --stats reports
+
+
 def signal_handler(sig, frame):
-    """Handle shutdown signals gracefully"""
+    """Handle SIGTERM gracefully (SIGINT keeps its default KeyboardInterrupt)"""
     print("\n🛑 Received shutdown signal...")
     sys.exit(0)
 
@@ -30,10 +34,24 @@ def print_banner():
     print("=" * 60)
 
 
+@lru_cache(maxsize=1)
+def validate_config_snapshot(snapshot: tuple) -> bool:
+    """Validate ProxyConfig once per distinct snapshot of its settings"""
+    return ProxyConfig.validate_config()
+
+
 def check_environment():
     """Check if environment is properly set up"""
     try:
-        ProxyConfig.validate_config()
+        validate_config_snapshot((
+            ProxyConfig.PROXY_HOST,
+            ProxyConfig.PROXY_PORT,
+            ProxyConfig.MAX_BYTES_PER_SECOND,
+            ProxyConfig.BURST_SIZE,
+            ProxyConfig.RESET_INTERVAL,
+            ProxyConfig.MAX_CONNECTIONS,
+            ProxyConfig.CONNECTION_TIMEOUT
+        ))
         print("✅ Configuration validation passed")
         return True
     except ValueError as e:
@@ -46,30 +64,25 @@ def format_bytes(bytes_value: int) -> str:
     if bytes_value == 0:
         return "unlimited"
     
-    units = ['B', 'KB', 'MB', 'GB']
-    unit_index = 0
-    value = float(bytes_value)
-    
-    while value >= 1024 and unit_index < len(units) - 1:
-        value /= 1024
-        unit_index += 1
+    # Each unit step is 10 bits, so the unit index follows from bit_length()
+    unit_index = min((bytes_value.bit_length() - 1) // 10, len(BYTE_UNITS) - 1)
     
     if unit_index == 0:
-        return f"{int(value)} {units[unit_index]}"
+        return f"{bytes_value} {BYTE_UNITS[0]}"
     else:
-        return f"{value:.2f} {units[unit_index]}"
+        return f"{bytes_value / (1 << (10 * unit_index)):.2f} {BYTE_UNITS[unit_index]}"
 
 
 def show_stats(server: SOCKS5Server):
-    """Show server statistics in a separate thread"""
-    while server.running:
-        time.sleep(30)  # Update every 30 seconds
-        uptime = time.time() - server.start_time.timestamp()
-        uptime_str = f"{int(uptime // 3600)}h {int((uptime % 3600) // 60)}m {int(uptime % 60)}s"
-        
-        print(f"\n📊 Stats: {server.client_count} clients, "
-              f"{format_bytes(server.total_bytes_transferred)} transferred, "
-              f"uptime: {uptime_str}")
+    """Show server statistics (called from the server's accept loop)"""
+    uptime = int(time.time() - server.start_time.timestamp())
+    minutes, seconds = divmod(uptime, 60)
+    hours, minutes = divmod(minutes, 60)
+    uptime_str = f"{hours}h {minutes}m {seconds}s"
+    
+    print(f"\n📊 Stats: {server.client_count} clients, "
+          f"{format_bytes(server.total_bytes_transferred)} transferred, "
+          f"uptime: {uptime_str}")
 
 
 def main():
@@ -157,28 +170,13 @@ Environment variables (optional):
     
     args = parser.parse_args()
     
-    # Setup signal handlers
-    signal.signal(signal.SIGINT, signal_handler)
+    # Setup signal handlers; Ctrl+C is handled by the KeyboardInterrupt branch below
     signal.signal(signal.SIGTERM, signal_handler)
     
     if not args.quiet:
         print_banner()
     
     # Override config with command line arguments
-    if args.host != ProxyConfig.PROXY_HOST:
-        os.environ['PROXY_HOST'] = args.host
-    if args.port != ProxyConfig.PROXY_PORT:
-        os.environ['PROXY_PORT'] = str(args.port)
-    if args.bps != ProxyConfig.MAX_BYTES_PER_SECOND:
-        os.environ['MAX_BYTES_PER_SECOND'] = str(args.bps)
-    if args.burst != ProxyConfig.BURST_SIZE:
-        os.environ['BURST_SIZE'] = str(args.burst)
-    if args.timeout != ProxyConfig.CONNECTION_TIMEOUT:
-        os.environ['CONNECTION_TIMEOUT'] = str(args.timeout)
-    if args.max_connections != ProxyConfig.MAX_CONNECTIONS:
-        os.environ['MAX_CONNECTIONS'] = str(args.max_connections)
-    
-    # Reload config with new values
     ProxyConfig.PROXY_HOST = args.host
     ProxyConfig.PROXY_PORT = args.port
     ProxyConfig.MAX_BYTES_PER_SECOND = args.bps
@@ -205,19 +203,15 @@ Environment variables (optional):
         reset_interval=1.0
     )
     
-    # Create server
+    # Create server, printing statistics every 30 seconds if requested
     server = SOCKS5Server(
         host=args.host,
         port=args.port,
-        bandwidth_config=bandwidth_config
+        bandwidth_config=bandwidth_config,
+        stats_interval=STATS_INTERVAL if args.stats and not args.quiet else 0,
+        stats_callback=show_stats
     )
     
-    # Start statistics thread if requested
-    stats_thread = None
-    if args.stats and not args.quiet:
-        stats_thread = threading.Thread(target=show_stats, args=(server,), daemon=True)
-        stats_thread.start()
-    
     print(f"🚀 Starting SOCKS5 proxy server on {args.host}:{args.port}")
     if args.bps > 0:
         print(f"📊 Bandwidth limit: {format_bytes(args.bps)}/s")
@@ -15,14 +15,19 @@ class Config:
     FACEBOOK_EMAIL = os.getenv('FACEBOOK_EMAIL')
     FACEBOOK_PASSWORD = os.getenv('FACEBOOK_PASSWORD')
     
+    # Saved session cookies, reused across cycles to skip the login form (empty = disabled).
+    # They grant full account access, so they live outside the shared logs/ volume.
+    SESSION_COOKIES_FILE = os.getenv('SESSION_COOKIES_FILE', 'data/session_cookies.json')
+    
     # Bot settings
     AUTO_REPLY_MESSAGE = os.getenv('AUTO_REPLY_MESSAGE', 
                                   'Terima kasih atas pesan Anda! Saya akan membalas sesegera mungkin.')
     
     # Selenium settings
     HEADLESS_MODE = os.getenv('HEADLESS_MODE', 'False').lower() == 'true'
-    IMPLICIT_WAIT = int(os.getenv('IMPLICIT_WAIT', '10'))
+    IMPLICIT_WAIT = int(os.getenv('IMPLICIT_WAIT', '10'))  # Explicit WebDriverWait timeout
     PAGE_LOAD_TIMEOUT = int(os.getenv('PAGE_LOAD_TIMEOUT', '30'))
+    CHROMEDRIVER_PATH = os.getenv('CHROMEDRIVER_PATH')  # Skip webdriver-manager lookup if set
     
     # VPS/Daemon settings
     DAEMON_MODE = os.getenv('DAEMON_MODE', 'False').lower() == 'true'
@@ -7,7 +7,8 @@ import time
 import logging
 import json
 import os
-from datetime import datetime
+import struct
+from functools import lru_cache
 from typing import List, Optional
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -25,6 +26,155 @@ from webdriver_manager.chrome import ChromeDriverManager
 from config import Config
 
 
+# Chrome command-line arguments shared by every driver the bot creates
+CHROME_ARGUMENTS = (
+    # Stability and VPS compatibility
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--disable-extensions',
+    '--disable-plugins',
+    '--disable-javascript',  # For initial page loads
+    '--window-size=1920,1080',
+    '--user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    
+    # VPS-specific optimizations
+    '--memory-pressure-off',
+    '--max_old_space_size=4096',
+    '--disable-background-timer-throttling',
+    '--disable-renderer-backgrounding',
+    '--disable-backgrounding-occluded-windows',
+)
+
+# Chrome profile preferences: block images (save bandwidth) and notification prompts
+CHROME_PREFS = {
+    'profile.managed_default_content_settings.images': 2,
+    'profile.default_content_setting_values.notifications': 2,
+}
+
+# Locators are built once at import and reused across daemon cycles
+# (selectors may need updates based on Facebook's current DOM structure)
+EMAIL_LOCATOR = (By.CSS_SELECTOR, Config.EMAIL_SELECTOR)
+PASSWORD_LOCATOR = (By.CSS_SELECTOR, Config.PASSWORD_SELECTOR)
+LOGIN_BUTTON_LOCATOR = (By.CSS_SELECTOR, Config.LOGIN_BUTTON_SELECTOR)
+
+LOGGED_IN_LOCATORS = (
+    (By.CSS_SELECTOR, '[data-testid="search"]'),
+    (By.CSS_SELECTOR, '[aria-label="Facebook"]'),
+)
+MESSENGER_LOADED_LOCATORS = (
+    (By.CSS_SELECTOR, '[aria-label="Chats"]'),
+    (By.CSS_SELECTOR, '[data-testid="messenger-inbox"]'),
+)
+# Conversation rows inside the inbox; present once the list has actually rendered
+CONVERSATION_LIST_LOCATORS = (
+    (By.CSS_SELECTOR, '[aria-label="Chats"] [role="row"]'),
+    (By.CSS_SELECTOR, '[data-testid="messenger-inbox"] [role="row"]'),
+)
+
+UNREAD_SELECTORS = (
+    '[aria-label*="unread"]',
+    '[data-testid*="unread"]',
+    '.unread',
+    '[style*="font-weight: bold"]'  # Bold text often indicates unread
+)
+UNREAD_WAIT_TIMEOUT = 3  # Seconds to wait for unread indicators to render
+WAIT_POLL_FREQUENCY = 0.1  # Explicit wait poll interval (Selenium default is 0.5 s)
+MESSAGE_INPUT_SELECTORS = (
+    '[aria-label*="Type a message"]',
+    '[data-testid="message-input"]',
+    '[placeholder*="Type a message"]',
+    'textarea[aria-label*="message"]'
+)
+# Heartbeat file read by health_check.py: a single little-endian float64 unix timestamp
+HEARTBEAT_FILE = 'logs/bot_status.bin'
+HEARTBEAT_FORMAT = '<d'
+
+SEND_BUTTON_SELECTORS = (
+    '[aria-label*="Send"]',
+    '[data-testid*="send"]',
+    'button[type="submit"]'
+)
+
+# Fills email and password and clicks login. Values go through the native input
+# setter plus input/change events so script-managed forms register them too.
+FILL_LOGIN_FORM_SCRIPT = """
+const [email, password, button] = [arguments[0], arguments[1], arguments[2]].map(
+    selector => document.querySelector(selector)
+);
+if (!email || !password || !button) {
+    return false;
+}
+const setValue = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+for (const [input, value] of [[email, arguments[3]], [password, arguments[4]]]) {
+    setValue.call(input, value);
+    input.dispatchEvent(new Event('input', {bubbles: true}));
+    input.dispatchEvent(new Event('change', {bubbles: true}));
+}
+button.click();
+return true;
+"""
+
+# Returns the first enabled element matching the selectors in priority order,
+# or null, replacing one find_element + is_enabled round-trip pair per selector
+FIND_SEND_BUTTON_SCRIPT = """
+for (const selector of arguments[0]) {
+    const button = document.querySelector(selector);
+    if (button && !button.disabled) {
+        return button;
+    }
+}
+return null;
+"""
+
+# True if the conversation row is the thread already open: either it is marked
+# current/selected, or its /t/ thread link is the page currently shown
+IS_ACTIVE_CONVERSATION_SCRIPT = """
+const row = arguments[0];
+const active = '[aria-current]:not([aria-current="false"]), [aria-selected="true"]';
+if (row.matches(active) || row.querySelector(active)) {
+    return true;
+}
+const link = row.matches('a[href*="/t/"]') ? row : row.querySelector('a[href*="/t/"]');
+if (!link) {
+    return false;
+}
+const threadPath = new URL(link.href, location.href).pathname.replace(/\\/$/, '');
+return location.pathname.replace(/\\/$/, '') === threadPath;
+"""
+
+# Resolves every unread indicator to its outermost role="button" conversation
+# ancestor inside the page, so the whole scan is a single WebDriver round-trip
+FIND_UNREAD_CONVERSATIONS_SCRIPT = """
+const conversations = [];
+for (const selector of arguments[0]) {
+    for (const indicator of document.querySelectorAll(selector)) {
+        let conversation = null;
+        for (let node = indicator.parentElement; node; node = node.parentElement) {
+            if (node.getAttribute('role') === 'button') {
+                conversation = node;
+            }
+        }
+        if (conversation && !conversations.includes(conversation)) {
+            conversations.push(conversation);
+        }
+    }
+}
+return conversations;
+"""
+
+
+@lru_cache(maxsize=1)
+def get_chromedriver_path() -> str:
+    """
+    Resolve the ChromeDriver binary once per process
+    
+    Returns:
+        str: CHROMEDRIVER_PATH if set, otherwise the path installed by webdriver-manager
+    """
+    return Config.CHROMEDRIVER_PATH or ChromeDriverManager().install()
+
+
 class MessengerBot:
     """Facebook Messenger Bot for automatic message replies"""
     
@@ -46,14 +196,16 @@ class MessengerBot:
             
         log_file = os.path.join(log_dir, 'messenger_bot.log')
         
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_file),
-                logging.StreamHandler()
-            ]
-        )
+        # Configure the root logger only once per process (one handler set per file)
+        if not logging.getLogger().handlers:
+            logging.basicConfig(
+                level=logging.INFO,
+                format='%(asctime)s - %(levelname)s - %(message)s',
+                handlers=[
+                    logging.FileHandler(log_file, delay=True),
+                    logging.StreamHandler()
+                ]
+            )
         return logging.getLogger(__name__)
         
     def _setup_driver(self) -> None:
@@ -61,42 +213,35 @@ class MessengerBot:
         try:
             chrome_options = Options()
             
-            # Add Chrome options for stability and VPS compatibility
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-gpu')
-            chrome_options.add_argument('--disable-extensions')
-            chrome_options.add_argument('--disable-plugins')
-            chrome_options.add_argument('--disable-images')  # Save bandwidth
-            chrome_options.add_argument('--disable-javascript')  # For initial page loads
-            chrome_options.add_argument('--window-size=1920,1080')
-            chrome_options.add_argument('--user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
-            
-            # VPS-specific optimizations
-            chrome_options.add_argument('--memory-pressure-off')
-            chrome_options.add_argument('--max_old_space_size=4096')
-            chrome_options.add_argument('--disable-background-timer-throttling')
-            chrome_options.add_argument('--disable-renderer-backgrounding')
-            chrome_options.add_argument('--disable-backgrounding-occluded-windows')
+            for argument in CHROME_ARGUMENTS:
+                chrome_options.add_argument(argument)
+            chrome_options.add_experimental_option('prefs', CHROME_PREFS)
+            
+            # Return from driver.get() at DOMContentLoaded; explicit waits
+            # cover the elements each step actually needs
+            chrome_options.page_load_strategy = 'eager'
             
             if Config.HEADLESS_MODE:
                 chrome_options.add_argument('--headless')
                 
-            # Setup ChromeDriver service
-            service = Service(ChromeDriverManager().install())
+            # Setup ChromeDriver service (driver path is resolved only once)
+            service = Service(get_chromedriver_path())
             
             # Initialize driver
             self.driver = webdriver.Chrome(service=service, options=chrome_options)
-            self.driver.implicitly_wait(Config.IMPLICIT_WAIT)
             self.driver.set_page_load_timeout(Config.PAGE_LOAD_TIMEOUT)
             
-            # Setup WebDriverWait
-            self.wait = WebDriverWait(self.driver, Config.IMPLICIT_WAIT)
+            # Setup WebDriverWait. No implicit wait is set on the driver: mixing
+            # the two makes every missed find_element block for the full timeout,
+            # so all waiting goes through explicit waits instead.
+            self.wait = WebDriverWait(self.driver, Config.IMPLICIT_WAIT, poll_frequency=WAIT_POLL_FREQUENCY)
             
             self.logger.info("Chrome WebDriver initialized successfully")
             
         except Exception as e:
             self.logger.error(f"Failed to setup WebDriver: {str(e)}")
+            # Re-resolve next cycle in case Chrome was upgraded under the cached driver
+            get_chromedriver_path.cache_clear()
             raise
             
     def login_to_facebook(self) -> bool:
@@ -107,6 +252,11 @@ class MessengerBot:
             bool: True if login successful, False otherwise
         """
         try:
+            # Skip the credential flow if the saved session is still valid
+            if self._restore_session():
+                self.logger.info("Reused saved Facebook session")
+                return True
+                
             self.logger.info("Attempting to login to Facebook...")
             
             # Navigate to Facebook
@@ -114,31 +264,45 @@ class MessengerBot:
             
             # Wait for login form to load
             email_input = self.wait.until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, Config.EMAIL_SELECTOR))
+                EC.presence_of_element_located(EMAIL_LOCATOR)
             )
             
-            # Enter credentials
-            email_input.clear()
-            email_input.send_keys(Config.FACEBOOK_EMAIL)
-            
-            password_input = self.driver.find_element(By.CSS_SELECTOR, Config.PASSWORD_SELECTOR)
-            password_input.clear()
-            password_input.send_keys(Config.FACEBOOK_PASSWORD)
-            
-            # Click login button
-            login_button = self.driver.find_element(By.CSS_SELECTOR, Config.LOGIN_BUTTON_SELECTOR)
-            login_button.click()
+            # Enter credentials and submit in a single round-trip
+            try:
+                submitted = self.driver.execute_script(
+                    FILL_LOGIN_FORM_SCRIPT,
+                    Config.EMAIL_SELECTOR,
+                    Config.PASSWORD_SELECTOR,
+                    Config.LOGIN_BUTTON_SELECTOR,
+                    Config.FACEBOOK_EMAIL,
+                    Config.FACEBOOK_PASSWORD
+                )
+            except WebDriverException as e:
+                self.logger.warning(f"Scripted login failed, typing credentials instead: {str(e)}")
+                submitted = False
+                
+            if not submitted:
+                email_input.clear()
+                email_input.send_keys(Config.FACEBOOK_EMAIL)
+                
+                password_input = self.driver.find_element(*PASSWORD_LOCATOR)
+                password_input.clear()
+                password_input.send_keys(Config.FACEBOOK_PASSWORD)
+                
+                # Click login button
+                login_button = self.driver.find_element(*LOGIN_BUTTON_LOCATOR)
+                login_button.click()
             
             # Wait for login to complete (check for home page elements)
             self.wait.until(
                 EC.any_of(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, '[data-testid="search"]')),
-                    EC.presence_of_element_located((By.CSS_SELECTOR, '[aria-label="Facebook"]')),
+                    *(EC.presence_of_element_located(locator) for locator in LOGGED_IN_LOCATORS),
                     EC.url_contains('facebook.com/home')
                 )
             )
             
             self.logger.info("Successfully logged into Facebook")
+            self._save_session()
             return True
             
         except TimeoutException:
@@ -151,6 +315,72 @@ class MessengerBot:
             self.logger.error(f"Unexpected error during login: {str(e)}")
             return False
             
+    def _restore_session(self) -> bool:
+        """
+        Restore saved Facebook session cookies
+        
+        Returns:
+            bool: True if the restored session is logged in, False otherwise
+        """
+        if not Config.SESSION_COOKIES_FILE or not os.path.exists(Config.SESSION_COOKIES_FILE):
+            return False
+            
+        try:
+            with open(Config.SESSION_COOKIES_FILE, 'r') as f:
+                session = json.load(f)
+                
+            # Cookies saved for another account must not be reused after FACEBOOK_EMAIL changes
+            if not isinstance(session, dict) or session.get('email') != Config.FACEBOOK_EMAIL:
+                self.logger.info("Saved session belongs to a different account, logging in with credentials")
+                return False
+            cookies = session.get('cookies', [])
+            
+            # Cookies can only be added for the domain currently loaded
+            self.driver.get(Config.FACEBOOK_URL)
+            for cookie in cookies:
+                self.driver.add_cookie(cookie)
+            self.driver.get(Config.FACEBOOK_URL)
+            
+            # Either the logged-in page or the login form shows up, whichever applies
+            self.wait.until(
+                EC.any_of(
+                    *(EC.presence_of_element_located(locator) for locator in LOGGED_IN_LOCATORS),
+                    EC.presence_of_element_located(EMAIL_LOCATOR)
+                )
+            )
+            if not self.driver.find_elements(*EMAIL_LOCATOR):
+                # Facebook rotates session cookies; keep the saved copy current
+                self._save_session()
+                return True
+                
+            self.logger.info("Saved session expired, logging in with credentials")
+            
+        except TimeoutException:
+            self.logger.warning("Timed out checking saved session, logging in with credentials")
+        except Exception as e:
+            self.logger.warning(f"Could not restore saved session: {str(e)}")
+            
+        self.driver.delete_all_cookies()
+        return False
+        
+    def _save_session(self) -> None:
+        """Save Facebook session cookies so the next cycle can skip the login form"""
+        if not Config.SESSION_COOKIES_FILE:
+            return
+            
+        try:
+            state_dir = os.path.dirname(Config.SESSION_COOKIES_FILE)
+            if state_dir:
+                os.makedirs(state_dir, mode=0o700, exist_ok=True)
+                
+            # Cookies are credentials: keep the file readable by the bot user only
+            fd = os.open(Config.SESSION_COOKIES_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'email': Config.FACEBOOK_EMAIL, 'cookies': self.driver.get_cookies()}, f)
+                
+        except Exception as e:
+            self.logger.error(f"Failed to save session cookies: {str(e)}")
+            
     def navigate_to_messenger(self) -> bool:
         """
         Navigate to Messenger
@@ -167,8 +397,7 @@ class MessengerBot:
             # Wait for Messenger to load
             self.wait.until(
                 EC.any_of(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, '[aria-label="Chats"]')),
-                    EC.presence_of_element_located((By.CSS_SELECTOR, '[data-testid="messenger-inbox"]')),
+                    *(EC.presence_of_element_located(locator) for locator in MESSENGER_LOADED_LOCATORS),
                     EC.url_contains('messenger.com')
                 )
             )
@@ -193,30 +422,32 @@ class MessengerBot:
         try:
             self.logger.info("Scanning for unread conversations...")
             
-            # Wait a moment for the page to fully load
-            time.sleep(3)
-            
-            # Look for unread message indicators
-            # This selector may need to be updated based on Facebook's current DOM
-            unread_selectors = [
-                '[aria-label*="unread"]',
-                '[data-testid*="unread"]',
-                '.unread',
-                '[style*="font-weight: bold"]'  # Bold text often indicates unread
-            ]
-            
-            unread_conversations = []
+            # Eager page loads return before the inbox renders, so wait for the
+            # conversation list itself before scanning it
+            try:
+                self.wait.until(
+                    EC.any_of(*(
+                        EC.presence_of_element_located(locator)
+                        for locator in CONVERSATION_LIST_LOCATORS
+                    ))
+                )
+            except TimeoutException:
+                self.logger.warning("Conversation list did not render, scanning anyway")
             
-            for selector in unread_selectors:
-                try:
-                    elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    for element in elements:
-                        # Try to find the parent conversation element
-                        conversation_element = element.find_element(By.XPATH, './ancestor::*[@role="button"]')
-                        if conversation_element and conversation_element not in unread_conversations:
-                            unread_conversations.append(conversation_element)
-                except NoSuchElementException:
-                    continue
+            # Give the list up to UNREAD_WAIT_TIMEOUT seconds to render an unread
+            # indicator, returning as soon as one appears
+            try:
+                WebDriverWait(self.driver, UNREAD_WAIT_TIMEOUT, poll_frequency=WAIT_POLL_FREQUENCY).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, ', '.join(UNREAD_SELECTORS)))
+                )
+            except TimeoutException:
+                pass
+            
+            # Look for unread message indicators and their parent conversation
+            # elements in one execute_script call instead of one find per element
+            unread_conversations = self.driver.execute_script(
+                FIND_UNREAD_CONVERSATIONS_SCRIPT, list(UNREAD_SELECTORS)
+            ) or []
                     
             self.logger.info(f"Found {len(unread_conversations)} unread conversations")
             return unread_conversations
@@ -236,29 +467,45 @@ class MessengerBot:
             bool: True if reply sent successfully, False otherwise
         """
         try:
+            # Remember what is on screen before switching: the previous thread's
+            # composer stays clickable until the new conversation has rendered
+            previous_url = self.driver.current_url
+            previous_inputs = self.driver.find_elements(
+                By.CSS_SELECTOR, ', '.join(MESSAGE_INPUT_SELECTORS)
+            )
+            # Clicking the thread that is already open switches nothing
+            already_open = self.driver.execute_script(
+                IS_ACTIVE_CONVERSATION_SCRIPT, conversation_element
+            )
+            
             # Click on the conversation
             conversation_element.click()
             
-            # Wait for the conversation to open
-            time.sleep(2)
-            
-            # Look for message input field
-            message_input_selectors = [
-                '[aria-label*="Type a message"]',
-                '[data-testid="message-input"]',
-                '[placeholder*="Type a message"]',
-                'textarea[aria-label*="message"]'
-            ]
-            
-            message_input = None
-            for selector in message_input_selectors:
+            # Wait for the switch before looking for the composer, otherwise the
+            # old thread's input would satisfy the wait below immediately
+            if previous_inputs and not already_open:
                 try:
-                    message_input = self.wait.until(
-                        EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
+                    self.wait.until(
+                        EC.any_of(
+                            EC.url_changes(previous_url),
+                            EC.staleness_of(previous_inputs[0])
+                        )
                     )
-                    break
                 except TimeoutException:
-                    continue
+                    self.logger.error("Conversation did not open, skipping reply")
+                    return False
+            
+            # Look for message input field
+            # Poll all candidate selectors in one wait instead of one full timeout each
+            try:
+                message_input = self.wait.until(
+                    EC.any_of(*(
+                        EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
+                        for selector in MESSAGE_INPUT_SELECTORS
+                    ))
+                )
+            except TimeoutException:
+                message_input = None
                     
             if not message_input:
                 self.logger.error("Could not find message input field")
@@ -268,23 +515,12 @@ class MessengerBot:
             message_input.clear()
             message_input.send_keys(Config.AUTO_REPLY_MESSAGE)
             
-            # Look for send button
-            send_button_selectors = [
-                '[aria-label*="Send"]',
-                '[data-testid*="send"]',
-                'button[type="submit"]'
-            ]
-            
-            send_button = None
-            for selector in send_button_selectors:
-                try:
-                    send_button = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    if send_button.is_enabled():
-                        break
-                except NoSuchElementException:
-                    continue
+            # Look for an enabled send button, all selectors in one round-trip
+            send_button = self.driver.execute_script(
+                FIND_SEND_BUTTON_SCRIPT, list(SEND_BUTTON_SELECTORS)
+            )
                     
-            if send_button and send_button.is_enabled():
+            if send_button:
                 send_button.click()
                 self.logger.info("Reply sent successfully")
                 return True
@@ -302,15 +538,11 @@ class MessengerBot:
     def update_heartbeat(self) -> None:
         """Update heartbeat for health monitoring"""
         try:
-            status_file = 'logs/bot_status.json'
-            status = {
-                'status': 'running',
-                'last_heartbeat': datetime.now().isoformat(),
-                'last_run': datetime.now().isoformat()
-            }
-            
-            with open(status_file, 'w') as f:
-                json.dump(status, f)
+            # Write then rename so health checks never read a truncated record
+            tmp_file = HEARTBEAT_FILE + '.tmp'
+            with open(tmp_file, 'wb') as f:
+                f.write(struct.pack(HEARTBEAT_FORMAT, time.time()))
+            os.replace(tmp_file, HEARTBEAT_FILE)
                 
         except Exception as e:
             self.logger.error(f"Failed to update heartbeat: {str(e)}")
@@ -18,7 +18,7 @@ class ProxyConfig:
     # Bandwidth settings
     MAX_BYTES_PER_SECOND = int(os.getenv('MAX_BYTES_PER_SECOND', '0'))  # 0 = unlimited
     BURST_SIZE = int(os.getenv('BURST_SIZE', '0'))  # Burst allowance in bytes
-    RESET_INTERVAL = float(os.getenv('RESET_INTERVAL', '1.0'))  # Reset counter interval
+    RESET_INTERVAL = float(os.getenv('RESET_INTERVAL', '1.0'))  # Token refill interval
     
     # Connection settings
     MAX_CONNECTIONS = int(os.getenv('MAX_CONNECTIONS', '100'))
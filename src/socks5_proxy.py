@@ -7,8 +7,8 @@ import struct
 import threading
 import time
 import logging
-from typing import Optional, Tuple, Dict, Any
-from datetime import datetime, timedelta
+from typing import Optional, Tuple, Callable
+from datetime import datetime
 from dataclasses import dataclass
 
 
@@ -17,73 +17,88 @@ class BandwidthConfig:
     """Bandwidth configuration for throttling"""
     max_bytes_per_second: int = 0  # 0 = unlimited
     burst_size: int = 0  # Allow burst up to this many bytes
-    reset_interval: float = 1.0  # Reset bandwidth counter every N seconds
+    reset_interval: float = 1.0  # Refill max_bytes_per_second bytes every N seconds
 
 
 class BandwidthThrottler:
-    """Bandwidth throttling manager"""
+    """Integer token-bucket bandwidth throttler
+    
+    Tokens are bytes. The bucket refills at max_bytes_per_second bytes per
+    reset_interval and holds at most max_bytes_per_second + burst_size bytes.
+    All bookkeeping uses integer nanoseconds from time.monotonic_ns().
+    """
     
     def __init__(self, config: BandwidthConfig):
         self.config = config
-        self.bytes_sent = 0
-        self.last_reset = time.time()
+        self.rate = config.max_bytes_per_second
+        self.capacity = config.max_bytes_per_second + config.burst_size
+        self.interval_ns = max(1, int(config.reset_interval * 1_000_000_000))
+        self.tokens = self.capacity
+        self.last_refill_ns = time.monotonic_ns()
         self.lock = threading.Lock()
     
+    def _refill(self):
+        """Add tokens for the time elapsed since the last refill (lock must be held)"""
+        now_ns = time.monotonic_ns()
+        elapsed_ns = now_ns - self.last_refill_ns
+        added = self.rate * elapsed_ns // self.interval_ns
+        if added > 0:
+            self.tokens += added
+            if self.tokens >= self.capacity:
+                self.tokens = self.capacity
+                self.last_refill_ns = now_ns
+            else:
+                # Carry over the part of the elapsed time not yet turned into tokens
+                self.last_refill_ns += added * self.interval_ns // self.rate
+    
+    def _deficit_delay(self, bytes_to_send: int) -> float:
+        """Seconds until bytes_to_send tokens are available (lock must be held)"""
+        deficit = bytes_to_send - self.tokens
+        if deficit <= 0:
+            return 0.0
+        return (deficit * self.interval_ns // self.rate) / 1_000_000_000
+    
     def can_send(self, bytes_to_send: int) -> bool:
         """Check if we can send the specified number of bytes"""
-        if self.config.max_bytes_per_second == 0:
+        if self.rate == 0:
             return True
             
         with self.lock:
-            current_time = time.time()
-            
-            # Reset counter if interval has passed
-            if current_time - self.last_reset >= self.config.reset_interval:
-                self.bytes_sent = 0
-                self.last_reset = current_time
-            
-            # Check if we can send within limits
-            if self.bytes_sent + bytes_to_send <= self.config.max_bytes_per_second:
-                return True
-            
-            # Check burst allowance
-            if self.config.burst_size > 0:
-                if self.bytes_sent + bytes_to_send <= self.config.max_bytes_per_second + self.config.burst_size:
-                    return True
-            
-            return False
+            self._refill()
+            return bytes_to_send <= self.tokens
     
     def record_sent(self, bytes_sent: int):
         """Record bytes sent for throttling"""
+        if self.rate == 0:
+            return
+            
         with self.lock:
-            self.bytes_sent += bytes_sent
+            self.tokens -= bytes_sent
     
     def get_delay(self, bytes_to_send: int) -> float:
         """Calculate delay needed to stay within bandwidth limits"""
-        if self.config.max_bytes_per_second == 0:
+        if self.rate == 0:
             return 0.0
             
         with self.lock:
-            current_time = time.time()
-            
-            # Reset counter if interval has passed
-            if current_time - self.last_reset >= self.config.reset_interval:
-                self.bytes_sent = 0
-                self.last_reset = current_time
-                return 0.0
-            
-            # Calculate delay based on current usage
-            time_remaining = self.config.reset_interval - (current_time - self.last_reset)
-            bytes_available = max(0, self.config.max_bytes_per_second - self.bytes_sent)
-            
-            if bytes_to_send <= bytes_available:
-                return 0.0
-            
-            # Calculate delay needed
-            excess_bytes = bytes_to_send - bytes_available
-            delay = (excess_bytes / self.config.max_bytes_per_second) * self.config.reset_interval
+            self._refill()
+            return self._deficit_delay(bytes_to_send)
+    
+    def consume(self, bytes_to_send: int) -> float:
+        """
+        Take tokens for bytes_to_send and return the delay to sleep before sending
+        
+        Equivalent to get_delay() followed by record_sent(), with a single lock
+        acquisition; the bucket may go negative and is repaid by later refills.
+        """
+        if self.rate == 0:
+            return 0.0
             
-            return min(delay, time_remaining)
+        with self.lock:
+            self._refill()
+            delay = self._deficit_delay(bytes_to_send)
+            self.tokens -= bytes_to_send
+            return delay
 
 
 class SOCKS5Server:
@@ -119,10 +134,14 @@ class SOCKS5Server:
     COMMAND_NOT_SUPPORTED = 0x07
     ADDRESS_TYPE_NOT_SUPPORTED = 0x08
     
-    def __init__(self, host='127.0.0.1', port=1080, bandwidth_config: Optional[BandwidthConfig] = None):
+    def __init__(self, host='127.0.0.1', port=1080, bandwidth_config: Optional[BandwidthConfig] = None,
+                 stats_interval: float = 0, stats_callback: Optional[Callable[['SOCKS5Server'], None]] = None):
         self.host = host
         self.port = port
         self.bandwidth_config = bandwidth_config or BandwidthConfig()
+        self.stats_interval = stats_interval  # 0 = no periodic stats
+        self.stats_callback = stats_callback  # None = log stats via self.logger
+        self._next_stats_deadline = 0.0
         self.running = False
         self.server_socket: Optional[socket.socket] = None
         self.logger = self._setup_logging()
@@ -132,14 +151,16 @@ class SOCKS5Server:
         
     def _setup_logging(self) -> logging.Logger:
         """Setup logging for the proxy server"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - SOCKS5 - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('socks5_proxy.log'),
-                logging.StreamHandler()
-            ]
-        )
+        # Only the first server in a process configures the root logger
+        if not logging.getLogger().handlers:
+            logging.basicConfig(
+                level=logging.INFO,
+                format='%(asctime)s - SOCKS5 - %(levelname)s - %(message)s',
+                handlers=[
+                    logging.FileHandler('socks5_proxy.log', delay=True),
+                    logging.StreamHandler()
+                ]
+            )
         return logging.getLogger('socks5_proxy')
     
     def start(self):
@@ -151,18 +172,23 @@ class SOCKS5Server:
             self.server_socket.listen(128)
             
             self.running = True
-            self.logger.info(f"SOCKS5 Proxy server started on {self.host}:{self.port}")
+            self.logger.info("SOCKS5 Proxy server started on %s:%d", self.host, self.port)
             
             if self.bandwidth_config.max_bytes_per_second > 0:
-                self.logger.info(f"Bandwidth throttling enabled: {self.bandwidth_config.max_bytes_per_second} bytes/sec")
+                self.logger.info("Bandwidth throttling enabled: %d bytes/sec", self.bandwidth_config.max_bytes_per_second)
             else:
                 self.logger.info("Bandwidth throttling disabled (unlimited)")
             
+            self._next_stats_deadline = time.monotonic() + self.stats_interval
+            
             while self.running:
                 try:
+                    if self.stats_interval > 0:
+                        self._maybe_report_stats()
+                    
                     client_socket, addr = self.server_socket.accept()
                     self.client_count += 1
-                    self.logger.info(f"New connection from {addr} (Client #{self.client_count})")
+                    self.logger.info("New connection from %s (Client #%d)", addr, self.client_count)
                     
                     # Handle client in separate thread
                     client_thread = threading.Thread(
@@ -172,15 +198,36 @@ class SOCKS5Server:
                     )
                     client_thread.start()
                     
+                except socket.timeout:
+                    # Stats deadline reached while waiting for a client
+                    continue
                 except socket.error as e:
                     if self.running:
-                        self.logger.error(f"Socket error: {e}")
+                        self.logger.error("Socket error: %s", e)
                     
         except Exception as e:
-            self.logger.error(f"Failed to start server: {e}")
+            self.logger.error("Failed to start server: %s", e)
         finally:
             self.stop()
     
+    def _maybe_report_stats(self):
+        """Report stats if the deadline has passed and bound accept() by the next one"""
+        now = time.monotonic()
+        if now >= self._next_stats_deadline:
+            if self.stats_callback:
+                self.stats_callback(self)
+            else:
+                self._log_stats()
+            self._next_stats_deadline = now + self.stats_interval
+        
+        self.server_socket.settimeout(self._next_stats_deadline - now)
+    
+    def _log_stats(self):
+        """Log the session stats when no stats_callback is set"""
+        uptime = datetime.now() - self.start_time
+        self.logger.info("Stats: %d clients, %d bytes transferred, uptime: %s",
+                         self.client_count, self.total_bytes_transferred, uptime)
+    
     def stop(self):
         """Stop the SOCKS5 proxy server"""
         self.running = False
@@ -191,8 +238,9 @@ class SOCKS5Server:
                 pass
         
         uptime = datetime.now() - self.start_time
-        self.logger.info(f"SOCKS5 Proxy server stopped")
-        self.logger.info(f"Session stats: {self.client_count} clients, {self.total_bytes_transferred} bytes transferred, uptime: {uptime}")
+        self.logger.info("SOCKS5 Proxy server stopped")
+        self.logger.info("Session stats: %d clients, %d bytes transferred, uptime: %s",
+                         self.client_count, self.total_bytes_transferred, uptime)
     
     def _handle_client(self, client_socket: socket.socket, client_addr):
         """Handle a client connection"""
@@ -212,7 +260,7 @@ class SOCKS5Server:
             self._relay_data(client_socket, target_socket, bandwidth_throttler, client_addr)
             
         except Exception as e:
-            self.logger.error(f"Error handling client {client_addr}: {e}")
+            self.logger.error("Error handling client %s: %s", client_addr, e)
         finally:
             try:
                 client_socket.close()
@@ -249,7 +297,7 @@ class SOCKS5Server:
                 return False
                 
         except Exception as e:
-            self.logger.error(f"Auth negotiation error: {e}")
+            self.logger.error("Auth negotiation error: %s", e)
             return False
     
     def _handle_connection_request(self, client_socket: socket.socket) -> Optional[socket.socket]:
@@ -281,20 +329,20 @@ class SOCKS5Server:
             
             try:
                 target_socket.connect((dest_addr, dest_port))
-                self.logger.info(f"Connected to {dest_addr}:{dest_port}")
+                self.logger.info("Connected to %s:%d", dest_addr, dest_port)
                 
                 # Send success response
                 self._send_success_response(client_socket, dest_addr, dest_port)
                 return target_socket
                 
             except socket.error as e:
-                self.logger.warning(f"Failed to connect to {dest_addr}:{dest_port}: {e}")
+                self.logger.warning("Failed to connect to %s:%d: %s", dest_addr, dest_port, e)
                 self._send_error_response(client_socket, self.CONNECTION_REFUSED)
                 target_socket.close()
                 return None
                 
         except Exception as e:
-            self.logger.error(f"Connection request error: {e}")
+            self.logger.error("Connection request error: %s", e)
             return None
     
     def _parse_address(self, client_socket: socket.socket, atyp: int) -> Tuple[Optional[str], Optional[int]]:
@@ -334,7 +382,7 @@ class SOCKS5Server:
             return addr, port
             
         except Exception as e:
-            self.logger.error(f"Address parsing error: {e}")
+            self.logger.error("Address parsing error: %s", e)
             return None, None
     
     def _send_success_response(self, client_socket: socket.socket, bind_addr: str, bind_port: int):
@@ -351,7 +399,7 @@ class SOCKS5Server:
             client_socket.send(response)
             
         except Exception as e:
-            self.logger.error(f"Error sending success response: {e}")
+            self.logger.error("Error sending success response: %s", e)
     
     def _send_error_response(self, client_socket: socket.socket, error_code: int):
         """Send error response"""
@@ -363,7 +411,7 @@ class SOCKS5Server:
             client_socket.send(response)
             
         except Exception as e:
-            self.logger.error(f"Error sending error response: {e}")
+            self.logger.error("Error sending error response: %s", e)
     
     def _relay_data(self, client_socket: socket.socket, target_socket: socket.socket, 
                    bandwidth_throttler: BandwidthThrottler, client_addr):
@@ -379,16 +427,15 @@ class SOCKS5Server:
                     
                     # Apply bandwidth throttling
                     if direction == "client->target":
-                        delay = bandwidth_throttler.get_delay(len(data))
+                        delay = bandwidth_throttler.consume(len(data))
                         if delay > 0:
                             time.sleep(delay)
-                        bandwidth_throttler.record_sent(len(data))
                     
                     destination.send(data)
                     self.total_bytes_transferred += len(data)
                     
             except Exception as e:
-                self.logger.debug(f"Data relay error ({direction}): {e}")
+                self.logger.debug("Data relay error (%s): %s", direction, e)
             finally:
                 try:
                     source.close()
@@ -417,7 +464,7 @@ class SOCKS5Server:
         client_to_target.join()
         target_to_client.join()
         
-        self.logger.info(f"Connection from {client_addr} closed")
+        self.logger.info("Connection from %s closed", client_addr)
 
 
 def main():
@@ -61,6 +61,40 @@ def test_bandwidth_throttler():
         assert delay > 0, "Should have delay for excess bytes"
         print("✅ Delay calculation test passed")
         
+        # Test token bucket accounting with a frozen clock
+        from unittest import mock
+        clock = [1_000_000_000]
+        with mock.patch('socks5_proxy.time.monotonic_ns', side_effect=lambda: clock[0]):
+            config = BandwidthConfig(max_bytes_per_second=1000, burst_size=500, reset_interval=1.0)
+            throttler = BandwidthThrottler(config)
+            assert throttler.tokens == 1500, "Bucket should start full at rate + burst"
+            
+            # Over capacity: delay covers the excess and the balance goes negative
+            assert throttler.consume(2000) == 0.5, "Should delay (2000 - 1500) / 1000 s"
+            assert throttler.tokens == -500, "Balance should go negative"
+            
+            # A second consume adds on top of the existing deficit
+            assert throttler.consume(1000) == 1.5, "Should delay (1000 + 500) / 1000 s"
+            assert throttler.tokens == -1500, "Deficit should accumulate"
+            
+            # Refill repays the deficit but never exceeds rate + burst
+            clock[0] += 10_000_000_000
+            assert throttler.get_delay(0) == 0.0, "Should have no delay after refill"
+            assert throttler.tokens == 1500, "Refill should be capped at rate + burst"
+            
+            # Partial refill: half an interval adds half the rate
+            throttler.consume(1500)
+            clock[0] += 500_000_000
+            assert throttler.can_send(500), "Should refill 500 bytes in 0.5 s"
+            assert throttler.tokens == 500, "Refill should be proportional to elapsed time"
+            
+            # Unlimited bandwidth never touches the bucket
+            throttler = BandwidthThrottler(BandwidthConfig(max_bytes_per_second=0, burst_size=500))
+            tokens = throttler.tokens
+            assert throttler.consume(1000000) == 0.0, "Should have no delay for unlimited"
+            assert throttler.tokens == tokens, "Unlimited consume should not change tokens"
+        print("✅ Token bucket test passed")
+        
         return True
         
     except Exception as e:
@@ -133,6 +167,30 @@ def test_proxy_config():
         return False
 
 
+def test_format_bytes():
+    """Test human readable byte formatting at unit boundaries"""
+    print("\n📋 Testing Byte Formatting:")
+    print("-" * 40)
+    
+    try:
+        from run_proxy import format_bytes
+        
+        assert format_bytes(0) == "unlimited", "Zero should mean unlimited"
+        assert format_bytes(1023) == "1023 B", "Below 1 KB should stay in bytes"
+        assert format_bytes(1024) == "1.00 KB", "1024 bytes should be 1 KB"
+        assert format_bytes(2**20 - 1) == "1024.00 KB", "Just below 1 MB should stay in KB"
+        assert format_bytes(2**20) == "1.00 MB", "2**20 bytes should be 1 MB"
+        assert format_bytes(2**30) == "1.00 GB", "2**30 bytes should be 1 GB"
+        assert format_bytes(2**50) == "1048576.00 GB", "GB should be the largest unit"
+        print("✅ Byte formatting test passed")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Byte formatting test failed: {e}")
+        return False
+
+
 def test_socks5_protocol_constants():
     """Test SOCKS5 protocol constants"""
     print("\n📋 Testing SOCKS5 Protocol Constants:")
@@ -209,6 +267,62 @@ def run_basic_server_test():
         return False
 
 
+def run_stats_interval_test():
+    """Test periodic stats reporting from the accept loop"""
+    print("\n📋 Testing Stats Interval:")
+    print("-" * 40)
+    
+    try:
+        from socks5_proxy import SOCKS5Server, BandwidthConfig
+        
+        # Start a real server on an auto-assigned port with a counting callback
+        stats_calls = []
+        server = SOCKS5Server(host='127.0.0.1', port=0,
+                              bandwidth_config=BandwidthConfig(max_bytes_per_second=0),
+                              stats_interval=0.1,
+                              stats_callback=lambda srv: stats_calls.append(time.monotonic()))
+        
+        # Record the accepted socket's timeout instead of speaking SOCKS5
+        client_timeouts = []
+        def record_client(client_socket, client_addr):
+            client_timeouts.append(client_socket.gettimeout())
+            client_socket.close()
+        server._handle_client = record_client
+        
+        server_thread = threading.Thread(target=server.start, daemon=True)
+        server_thread.start()
+        
+        deadline = time.time() + 2
+        while not server.running and time.time() < deadline:
+            time.sleep(0.01)
+        assert server.running, "Server should start"
+        
+        # Accepting a client must not inherit the stats timeout of the listener
+        actual_port = server.server_socket.getsockname()[1]
+        with socket.create_connection(('127.0.0.1', actual_port), timeout=2):
+            pass
+        
+        time.sleep(0.55)
+        assert client_timeouts == [None], "Accepted client socket should be blocking"
+        print("✅ Client socket timeout test passed")
+        
+        gaps = [b - a for a, b in zip(stats_calls, stats_calls[1:])]
+        assert 3 <= len(stats_calls) <= 7, f"Expected ~5 stats reports, got {len(stats_calls)}"
+        assert all(gap >= 0.09 for gap in gaps), "Stats should not be reported faster than the interval"
+        print(f"✅ Stats cadence test passed ({len(stats_calls)} reports)")
+        
+        # stop() must end the accept loop
+        server.stop()
+        server_thread.join(timeout=2)
+        assert not server_thread.is_alive(), "Accept loop should exit after stop()"
+        print("✅ Stats server stop test passed")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Stats interval test failed: {e}")
+        return False
+
+
 def main():
     """Run all tests"""
     print("🧪 Running SOCKS5 Proxy Tests")
@@ -219,9 +333,11 @@ def main():
         ("Bandwidth Throttler", test_bandwidth_throttler),
         ("Server Creation", test_socks5_server_creation),
         ("Proxy Configuration", test_proxy_config),
+        ("Byte Formatting", test_format_bytes),
         ("Protocol Constants", test_socks5_protocol_constants),
         ("Socket Creation", test_socket_creation),
         ("Basic Server Operations", run_basic_server_test),
+        ("Stats Interval", run_stats_interval_test),
     ]
     
     passed = 0